@@ -5,16 +5,64 @@ Just reads HTML and checks if city name + postal code prefix appear together
 """
 
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+from bs4 import BeautifulSoup, SoupStrainer
 import re
 from typing import List, Optional
 from datetime import datetime, timedelta
 import json
+import hashlib
+import random
 import os
 import sys
 from pathlib import Path
+from urllib.parse import urljoin
+
+
+# City postal code prefixes (just 2 digits)
+CITY_PREFIXES = {
+    'paris': '75',
+    'lyon': '69',
+    'marseille': '13',
+    'toulouse': '31',
+    'nice': '06',
+    'nantes': '44',
+    'strasbourg': '67',
+    'montpellier': '34',
+    'bordeaux': '33',
+    'lille': '59',
+    'rennes': '35',
+    'reims': '51',
+    'grenoble': '38',
+}
+
+# 5-digit postal code starting with each city's prefix (e.g. 38400), compiled once
+CITY_POSTAL_CODE_PATTERNS = {
+    city: re.compile(rf'\b{prefix}\d{{3}}\b')
+    for city, prefix in CITY_PREFIXES.items()
+}
+
+# Links to actual listings, and the last-resort listing container classes
+LISTING_HREF_PATTERN = re.compile(r'/logement/|/residence/')
+LISTING_CLASS_PATTERN = re.compile(r'(card|listing|residence|logement)', re.I)
+
+# Listings only live in the page body; <head> scripts, styles and meta are not built
+PAGE_STRAINER = SoupStrainer('body')
+
+# How much of a listing's text is searched for the city and postal code
+MAX_MATCH_TEXT_LENGTH = 4096
+
+# (connect, read) timeouts: an unreachable host fails fast instead of using up the read timeout
+PAGE_TIMEOUT = (3.05, 15)
+TELEGRAM_TIMEOUT = (3.05, 10)
+
+# Telegram rejects messages over 4096 characters; keep some headroom for emoji
+# counted as two characters on Telegram's side
+TELEGRAM_MAX_MESSAGE_LENGTH = 4000
 
 
 class CROUSScraper:
@@ -23,150 +71,116 @@ class CROUSScraper:
         self.telegram_chat_id = telegram_chat_id
         self.target_city = target_city.strip().lower()
         self.base_url = "https://trouverunlogement.lescrous.fr"
+        self._base_for_join = self.base_url.rstrip('/') + '/'
         self.main_search_url = "https://trouverunlogement.lescrous.fr/tools/42/search"
+        self.city_regex = re.compile(rf'\b{re.escape(self.target_city)}\b', re.IGNORECASE)
         
-        # City postal code prefixes (just 2 digits)
-        self.city_prefixes = {
-            'paris': '75',
-            'lyon': '69',
-            'marseille': '13',
-            'toulouse': '31',
-            'nice': '06',
-            'nantes': '44',
-            'strasbourg': '67',
-            'montpellier': '34',
-            'bordeaux': '33',
-            'lille': '59',
-            'rennes': '35',
-            'reims': '51',
-            'grenoble': '38',
-        }
+        # url -> (ETag, Last-Modified, body hash, results) from the previous check
+        self.page_cache = {}
         
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
+            # Compressed responses; includes br (Brotli) only when a Brotli decoder is installed
+            'Accept-Encoding': ACCEPT_ENCODING,
         })
+        
+        # Enough pooled connections for the concurrent page downloads, and retry
+        # transient server errors instead of losing the page. A server Retry-After
+        # (e.g. an hour-long maintenance 503) is ignored so the backoff stays short
+        # and Ctrl+C is not stuck behind it
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET'],
+                respect_retry_after_header=False
+            )
+        ))
+        
+        # Separate session for Telegram so notifications reuse one keep-alive connection
+        self.telegram_session = requests.Session()
+        self.telegram_session.mount('https://', HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=4,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        ))
+
+    def close(self):
+        """Close the pooled connections of the scraping and Telegram sessions"""
+        self.session.close()
+        self.telegram_session.close()
 
     def send_telegram_message(self, message: str) -> bool:
-        """Send a message to Telegram bot"""
+        """Send a message to Telegram bot, split into several if it is too long"""
         try:
             url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
-            data = {
-                'chat_id': self.telegram_chat_id,
-                'text': message,
-                'parse_mode': 'HTML'
-            }
-            response = requests.post(url, data=data, timeout=10)
-            return response.status_code == 200
+            for part in self.split_telegram_message(message):
+                data = {
+                    'chat_id': self.telegram_chat_id,
+                    'text': part,
+                    'parse_mode': 'HTML',
+                    'disable_web_page_preview': True
+                }
+                response = self.telegram_session.post(url, data=data, timeout=TELEGRAM_TIMEOUT)
+                if response.status_code != 200:
+                    return False
+            return True
         except Exception:
             return False
 
+    def split_telegram_message(self, message: str) -> List[str]:
+        """Split a message at line breaks into parts that fit Telegram's length limit"""
+        if len(message) <= TELEGRAM_MAX_MESSAGE_LENGTH:
+            return [message]
+        
+        parts = []
+        current = ''
+        for line in message.splitlines(keepends=True):
+            if current and len(current) + len(line) > TELEGRAM_MAX_MESSAGE_LENGTH:
+                parts.append(current)
+                current = ''
+            current += line
+        if current.strip():
+            parts.append(current)
+        return parts
+
     def scan_for_city_accommodations(self, max_pages: int = 5) -> Optional[List[dict]]:
         """Scan CROUS pages - ULTRA SIMPLE"""
         results = []
         
         try:
             # Get prefix for this city
-            if self.target_city not in self.city_prefixes:
+            if self.target_city not in CITY_PREFIXES:
                 print(f"⚠️ No postal prefix defined for {self.target_city}")
                 return None
             
-            required_prefix = self.city_prefixes[self.target_city]
+            required_prefix = CITY_PREFIXES[self.target_city]
+            postal_code_pattern = CITY_POSTAL_CODE_PATTERNS[self.target_city]
             
-            # Scan pages
-            for page_num in range(1, max_pages + 1):
-                if page_num == 1:
-                    url = self.main_search_url
-                else:
-                    url = f"{self.main_search_url}?page={page_num}"
-                
-                print(f"🔍 Scanning page {page_num}: {url}")
+            # Page 1 is the bare search URL, later pages add ?page=N
+            urls = [self.main_search_url] + [
+                f"{self.main_search_url}?page={page_num}" for page_num in range(2, max_pages + 1)
+            ]
+            
+            # Download all pages at once (pure network wait), then parse them in order
+            with ThreadPoolExecutor(max_workers=min(8, max_pages)) as executor:
+                pages = [executor.submit(self.fetch_page, url) for url in urls]
                 
-                try:
-                    response = self.session.get(url, timeout=15)
-                    response.raise_for_status()
-                    html = response.text
-                    
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Be VERY specific - only look for links to actual listings
-                    # This avoids nested divs that cause duplicates
-                    possible_listings = soup.find_all('a', href=re.compile(r'/logement/|/residence/'))
-                    
-                    # If no links found, try article tags
-                    if not possible_listings:
-                        possible_listings = soup.find_all('article')
-                    
-                    # Last resort: find divs with specific classes only
-                    if not possible_listings:
-                        possible_listings = soup.find_all('div', class_=re.compile(r'(card|listing|residence|logement)', re.I))
+                for page_num, (url, page) in enumerate(zip(urls, pages), start=1):
+                    print(f"🔍 Scanning page {page_num}: {url}")
                     
-                    print(f"   Found {len(possible_listings)} listing elements")
-                    
-                    seen_links = set()  # Track which links we've already processed
-                    
-                    for listing in possible_listings:
-                        listing_text = listing.get_text()
-                        
-                        # Option 1: City name + prefix somewhere in text
-                        has_city = re.search(rf'\b{re.escape(self.target_city)}\b', listing_text, re.IGNORECASE)
-                        has_prefix = required_prefix in listing_text
-                        
-                        # Option 2: 5-digit postal code starting with prefix (e.g., 38400, 75013)
-                        postal_code_pattern = rf'\b{required_prefix}\d{{3}}\b'
-                        has_full_postal = re.search(postal_code_pattern, listing_text)
-                        
-                        # Accept if EITHER condition is true
-                        if (has_city and has_prefix) or has_full_postal:
-                            # Extract info
-                            title = "Logement trouvé"
-                            link = ""
-                            
-                            # Try to find link
-                            if listing.name == 'a':
-                                # This element IS the link
-                                link_elem = listing
-                            else:
-                                # Find link inside this element
-                                link_elem = listing.find('a', href=True)
-                            
-                            if link_elem and link_elem.get('href'):
-                                href = link_elem.get('href')
-                                if href.startswith('http'):
-                                    link = href
-                                else:
-                                    link = self.base_url + href if href.startswith('/') else self.base_url + '/' + href
-                                
-                                # Skip if we've already seen this link
-                                if link in seen_links:
-                                    continue
-                                seen_links.add(link)
-                            
-                            # Try to find title
-                            for tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                                title_elem = listing.find(tag)
-                                if title_elem:
-                                    title = title_elem.get_text(strip=True)
-                                    break
-                            
-                            # Get clean text
-                            clean_text = ' '.join(listing_text.split())[:400]
-                            
-                            result = {
-                                'title': title,
-                                'link': link,
-                                'context': clean_text,
-                                'page_number': page_num
-                            }
-                            
-                            results.append(result)
-                            print(f"   ✅ MATCH FOUND: {title}")
-                
-                except Exception as e:
-                    print(f"   ❌ Error scanning page {page_num}: {e}")
-                    continue
+                    try:
+                        results.extend(self.scan_page_if_changed(
+                            url, page.result(), page_num, required_prefix, postal_code_pattern))
+                    except Exception as e:
+                        print(f"   ❌ Error scanning page {page_num}: {e}")
+                        continue
             
             return results if results else None
         
@@ -174,24 +188,162 @@ class CROUSScraper:
             print(f"❌ Scan failed: {e}")
             return None
 
+    def fetch_page(self, url: str) -> requests.Response:
+        """Download one search page, letting the server answer 304 if it has not changed"""
+        headers = {}
+        cached = self.page_cache.get(url)
+        if cached:
+            etag, last_modified = cached[0], cached[1]
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
+        response = self.session.get(url, headers=headers, timeout=PAGE_TIMEOUT)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def scan_page_if_changed(self, url: str, response: requests.Response, page_num: int,
+                             required_prefix: str, postal_code_pattern: re.Pattern) -> List[dict]:
+        """Scan a downloaded page, reusing the previous results when the server
+        answered 304 or the body is byte-for-byte the same as last time"""
+        cached = self.page_cache.get(url)
+        if cached and response.status_code == 304:
+            print("   ℹ️ Page not modified since last check")
+            return cached[3]
+        
+        html = response.content
+        digest = hashlib.blake2b(html, digest_size=16).digest()
+        if cached and cached[2] == digest:
+            print("   ℹ️ Page unchanged since last check")
+            page_results = cached[3]
+        else:
+            page_results = self.scan_page(html, page_num, required_prefix, postal_code_pattern)
+        
+        self.page_cache[url] = (
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            digest,
+            page_results
+        )
+        return page_results
+
+    def find_possible_listings(self, soup: BeautifulSoup) -> list:
+        """Collect listing candidates in a single walk over the page"""
+        listing_links = []
+        articles = []
+        listing_divs = []
+        
+        for element in soup.find_all(['a', 'article', 'div']):
+            if element.name == 'a':
+                if LISTING_HREF_PATTERN.search(element.get('href', '')):
+                    listing_links.append(element)
+            elif element.name == 'article':
+                articles.append(element)
+            elif LISTING_CLASS_PATTERN.search(' '.join(element.get('class', []))):
+                listing_divs.append(element)
+        
+        # Be VERY specific - prefer links to actual listings, which avoids nested
+        # divs that cause duplicates. If no links found, try article tags, and as
+        # a last resort divs with specific classes only
+        return listing_links or articles or listing_divs
+
+    def scan_page(self, html: bytes, page_num: int, required_prefix: str,
+                  postal_code_pattern: re.Pattern) -> List[dict]:
+        """Look for listings of the target city on one downloaded page"""
+        results = []
+        
+        # Hand lxml the raw bytes so it decodes them once, in C
+        soup = BeautifulSoup(html, 'lxml', parse_only=PAGE_STRAINER)
+        
+        possible_listings = self.find_possible_listings(soup)
+        
+        print(f"   Found {len(possible_listings)} listing elements")
+        
+        seen_links = set()  # Track which links we've already matched
+        
+        for listing in possible_listings:
+            link = ""
+            
+            # Try to find link
+            if listing.name == 'a':
+                # This element IS the link
+                link_elem = listing
+            else:
+                # Find link inside this element
+                link_elem = listing.find('a', href=True)
+            
+            if link_elem and link_elem.get('href'):
+                link = urljoin(self._base_for_join, link_elem.get('href'))
+                
+                # Skip repeats of an already matched listing (image wrappers, "Voir" links...)
+                # before paying for its text and regex checks
+                if link in seen_links:
+                    continue
+            
+            listing_text = listing.get_text()
+            
+            # A real listing's address sits near the top of its text; bounding the
+            # matched text keeps a page-wide fallback container from being searched whole
+            match_text = listing_text[:MAX_MATCH_TEXT_LENGTH]
+            
+            # Both ways of matching need the prefix, so most listings are rejected
+            # by this substring check without running any regex
+            if required_prefix not in match_text:
+                continue
+            
+            # Accept if EITHER condition is true, trying the single postal code regex first:
+            # - 5-digit postal code starting with prefix (e.g., 38400, 75013)
+            # - City name + prefix somewhere in text
+            is_match = postal_code_pattern.search(match_text) or self.city_regex.search(match_text)
+            
+            if is_match:
+                # Extract info
+                title = "Logement trouvé"
+                if link:
+                    seen_links.add(link)
+                
+                # Try to find title
+                for tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
+                    title_elem = listing.find(tag)
+                    if title_elem:
+                        title = title_elem.get_text(strip=True)
+                        break
+                
+                # Get clean text
+                clean_text = ' '.join(listing_text.split())[:400]
+                
+                result = {
+                    'title': title,
+                    'link': link,
+                    'context': clean_text,
+                    'page_number': page_num
+                }
+                
+                results.append(result)
+                print(f"   ✅ MATCH FOUND: {title}")
+        
+        return results
+
     def format_telegram_message(self, results: List[dict]) -> str:
         """Format results into a Telegram message"""
         city_name = self.target_city.title()
-        prefix = self.city_prefixes.get(self.target_city, '??')
+        prefix = CITY_PREFIXES.get(self.target_city, '??')
         
-        message = f"🏠 <b>CROUS Housing Alert for {city_name}!</b>\n\n"
-        message += f"Found {len(results)} listing(s) with {city_name} + postal code {prefix}xxx:\n\n"
+        parts = [f"🏠 <b>CROUS Housing Alert for {city_name}!</b>\n\n"]
+        parts.append(f"Found {len(results)} listing(s) with {city_name} + postal code {prefix}xxx:\n\n")
         
         for i, result in enumerate(results, 1):
-            message += f"<b>{i}. {result['title']}</b>\n"
-            message += f"📍 {result['context'][:200]}...\n"
+            parts.append(f"<b>{i}. {result['title']}</b>\n")
+            parts.append(f"📍 {result['context'][:200]}...\n")
             if result['link']:
-                message += f"🔗 <a href='{result['link']}'>View Details</a>\n"
-            message += f"📄 Page {result.get('page_number', '?')}\n\n"
+                parts.append(f"🔗 <a href='{result['link']}'>View Details</a>\n")
+            parts.append(f"📄 Page {result.get('page_number', '?')}\n\n")
         
-        message += f"🕐 Checked at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        parts.append(f"🕐 Checked at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
-        return message
+        return ''.join(parts)
 
 
 class CROUSMonitorTerminal:
@@ -199,6 +351,7 @@ class CROUSMonitorTerminal:
         self.scraper = None
         self.monitoring = False
         self.monitor_thread = None
+        self.stop_event = threading.Event()
         self.settings_file = os.path.join(Path.home(), '.crous_monitor_settings.json')
         
         self.settings = {
@@ -214,18 +367,30 @@ class CROUSMonitorTerminal:
     def load_settings(self):
         try:
             if os.path.exists(self.settings_file):
-                with open(self.settings_file, 'r') as f:
-                    saved_settings = json.load(f)
-                    self.settings.update(saved_settings)
-                    return True
+                saved_settings = json.loads(Path(self.settings_file).read_bytes())
+                self.settings.update(saved_settings)
+                return True
         except Exception as e:
             print(f"❌ Failed to load settings: {e}")
         return False
 
     def save_settings(self):
         try:
-            with open(self.settings_file, 'w') as f:
-                json.dump(self.settings, f, indent=2)
+            settings_path = Path(self.settings_file)
+            new_contents = json.dumps(self.settings, indent=2).encode('utf-8')
+            
+            # Nothing to do if the file already holds exactly these settings
+            if settings_path.exists() and settings_path.read_bytes() == new_contents:
+                return True
+            
+            # Write to a temporary file and swap it in, so a crash mid-write
+            # can never leave a truncated settings file behind
+            tmp_path = settings_path.with_name(settings_path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(new_contents)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, settings_path)
             return True
         except Exception as e:
             print(f"❌ Failed to save settings: {e}")
@@ -302,6 +467,7 @@ class CROUSMonitorTerminal:
         print(f"\nℹ️ Starting test check for {self.settings['city'].title()}...")
         print(f"ℹ️ Scanning up to {self.settings['max_pages']} pages...\n")
         
+        scraper = None
         try:
             scraper = CROUSScraper(
                 self.settings['telegram_token'],
@@ -323,40 +489,55 @@ class CROUSMonitorTerminal:
         
         except Exception as e:
             print(f"❌ Test check failed: {e}")
+        finally:
+            if scraper:
+                scraper.close()
 
     def monitoring_loop(self):
         interval_seconds = self.settings['interval_minutes'] * 60
+        failures = 0
+        # The loop works only with the scraper it was started with: a restart may
+        # already have replaced self.scraper
+        scraper = self.scraper
         
         try:
             while self.monitoring:
                 try:
                     print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Starting scheduled check...")
                     
-                    results = self.scraper.scan_for_city_accommodations(self.settings['max_pages'])
+                    results = scraper.scan_for_city_accommodations(self.settings['max_pages'])
                     
                     if results:
-                        message = self.scraper.format_telegram_message(results)
-                        if self.scraper.send_telegram_message(message):
+                        message = scraper.format_telegram_message(results)
+                        if scraper.send_telegram_message(message):
                             print(f"✅ {len(results)} listing(s) found! Notification sent.")
                         else:
                             print(f"⚠️ Found listings but failed to send notification")
                     else:
                         print(f"ℹ️ No listings found")
+                    failures = 0
                     
                     next_time = datetime.now() + timedelta(minutes=self.settings['interval_minutes'])
                     print(f"ℹ️ Next check at: {next_time.strftime('%H:%M:%S')}")
                     
-                    for remaining in range(int(interval_seconds), 0, -1):
-                        if not self.monitoring:
-                            break
-                        time.sleep(1)
+                    # Sleep until the next check, waking early only if monitoring is stopped
+                    if self.stop_event.wait(timeout=interval_seconds):
+                        break
                 
                 except Exception as e:
                     print(f"❌ Error during monitoring: {e}")
-                    time.sleep(60)
+                    failures += 1
+                    # Back off from 60 s, doubling per consecutive failure up to the check
+                    # interval, with jitter so retries during an outage are spread out
+                    delay = min(interval_seconds, 60 * 2 ** (failures - 1))
+                    if self.stop_event.wait(timeout=delay / 2 + random.uniform(0, delay / 2)):
+                        break
         
         except KeyboardInterrupt:
             self.stop_monitoring()
+        finally:
+            # The scan using the sessions is over; release their pooled connections
+            scraper.close()
 
     def start_monitoring(self):
         if not self.validate_settings():
@@ -375,6 +556,7 @@ class CROUSMonitorTerminal:
             )
             
             self.monitoring = True
+            self.stop_event.clear()
             
             startup_message = f"🤖 <b>CROUS {self.settings['city'].title()} Monitor Started!</b>\n\nMonitoring every {self.settings['interval_minutes']} minutes."
             self.scraper.send_telegram_message(startup_message)
@@ -390,10 +572,13 @@ class CROUSMonitorTerminal:
             self.monitor_thread.start()
             
             try:
-                while self.monitoring:
-                    time.sleep(1)
+                # Join in short slices: a plain join() can't be interrupted by Ctrl+C on Windows
+                while self.monitor_thread.is_alive():
+                    self.monitor_thread.join(timeout=1)
             except KeyboardInterrupt:
                 self.stop_monitoring()
+                # Let a check in progress finish before returning to the menu
+                self.monitor_thread.join(timeout=5)
         
         except Exception as e:
             print(f"❌ Failed to start monitoring: {e}")
@@ -404,6 +589,7 @@ class CROUSMonitorTerminal:
             return
         
         self.monitoring = False
+        self.stop_event.set()
         
         if self.scraper:
             stop_message = f"🛑 <b>CROUS {self.settings['city'].title()} Monitor Stopped</b>"
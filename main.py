@@ -1,17 +1,38 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import time
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+from bs4 import BeautifulSoup, SoupStrainer, NavigableString, Tag
+import soupsieve
 import re
+import html
+from bisect import bisect_left, bisect_right
 from urllib.parse import urljoin
 import logging
 from typing import List, Optional
 from datetime import datetime
 import json
+import hashlib
+import random
 import os
 
+# (connect, read) timeouts: an unreachable host fails fast instead of using up the read timeout
+PAGE_TIMEOUT = (3.05, 15)
+TELEGRAM_TIMEOUT = (3.05, 10)
+
+# Telegram rejects messages over 4096 characters; keep some headroom for emoji
+# counted as two characters on Telegram's side
+TELEGRAM_MAX_MESSAGE_LENGTH = 4000
+
+# Returned by fetch_page_body when the server answers 304 to a conditional request
+NOT_MODIFIED = object()
+
 
 class CROUSScraper:
     def __init__(self, telegram_bot_token: str, telegram_chat_id: str, target_city: str):
@@ -21,42 +42,196 @@ class CROUSScraper:
         self.base_url = "https://trouverunlogement.lescrous.fr"
         self.main_search_url = "https://trouverunlogement.lescrous.fr/tools/42/search"
         
+        # Only build the page title and body; <head> scripts, styles and meta are skipped
+        self.page_strainer = SoupStrainer(['title', 'body'])
+        
+        # Regexes compiled once per scraper instead of on every page
+        self.city_regex = re.compile(rf'\b{re.escape(self.target_city)}\b', re.IGNORECASE)
+        self.title_pages_regex = re.compile(r'page\s+\d+\s+(?:sur|of)\s+(\d+)', re.IGNORECASE)
+        self.results_count_regex = re.compile(r'(\d+)\s+résultats?', re.IGNORECASE)
+        self.page_param_regex = re.compile(r'[?&]page=(\d+)')
+        
+        self.heading_tags = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+        self.block_tags = {'p', 'div', 'li', 'td', 'section', 'article', 'header', 'body'}
+        
+        # Search-related UI elements, joined so a page is matched against them in one pass
+        # and compiled once instead of on every select() call
+        self.search_selector = soupsieve.compile(', '.join([
+            '.search-suggestions',
+            '.autocomplete',
+            '.search-form',
+            '.search-bar',
+            '.search-input',
+            'input[type="search"]',
+            '[class*="search-suggestion"]',
+            '[class*="autocomplete"]',
+            '[id*="search-suggestion"]',
+            '[id*="autocomplete"]',
+            'script',
+            'style',
+        ]))
+        
+        # url -> (body hash, total pages, scan result) from the previous check
+        self.page_cache = {}
+        # url -> (ETag, Last-Modified) sent back as validators on the next check
+        self.page_validators = {}
+        
         # Session for maintaining cookies and better performance
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
+            # Includes br (Brotli) only when a Brotli decoder is installed
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'Referer': 'https://trouverunlogement.lescrous.fr/',
         })
 
+        # Keep enough pooled connections for a full multi-page scan, and retry
+        # transient server errors instead of losing the page. A server Retry-After
+        # (e.g. an hour-long maintenance 503) is ignored so the backoff stays short
+        # and a stop request is not stuck behind it
+        scraping_retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET'],
+            respect_retry_after_header=False
+        )
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=scraping_retry
+        ))
+
+        # Separate session for Telegram so alerts reuse one keep-alive connection.
+        # The adapter only retries failed connections; 429/5xx answers are handled
+        # by send_telegram_message so Telegram's retry_after can be honoured
+        self.telegram_session = requests.Session()
+        telegram_retry = Retry(
+            total=3,
+            read=0,
+            backoff_factor=0.5,
+            allowed_methods=['POST']
+        )
+        self.telegram_session.mount('https://', HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=4,
+            max_retries=telegram_retry
+        ))
+        
+        # Telegram allows about one message per second in a single chat
+        self.telegram_min_interval = 1.0
+        self.telegram_max_retries = 3
+        self.telegram_lock = threading.Lock()
+        self.last_telegram_send = 0.0
+
+    def close(self):
+        """Close the pooled connections of the scraping and Telegram sessions"""
+        self.session.close()
+        self.telegram_session.close()
+
+    def wait_for_telegram_slot(self):
+        """Block until sending another message stays within the per-chat rate limit"""
+        with self.telegram_lock:
+            delay = self.last_telegram_send + self.telegram_min_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.last_telegram_send = time.monotonic()
+
+    def get_telegram_retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """Work out how long to wait before retrying a rejected Telegram request"""
+        if response.status_code == 429:
+            try:
+                retry_after = response.json().get('parameters', {}).get('retry_after')
+            except ValueError:
+                retry_after = None
+            if retry_after is None:
+                retry_after = response.headers.get('Retry-After')
+            if retry_after is not None:
+                try:
+                    return min(30.0, float(retry_after))
+                except ValueError:
+                    pass
+        return min(30.0, 2.0 ** attempt)
+
     def send_telegram_message(self, message: str) -> bool:
-        """Send a message to Telegram bot"""
+        """Send a message to Telegram bot, split into several if it is too long"""
         try:
             url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
-            data = {
-                'chat_id': self.telegram_chat_id,
-                'text': message,
-                'parse_mode': 'HTML'
-            }
-            response = requests.post(url, data=data, timeout=10)
-            return response.status_code == 200
+            for part in self.split_telegram_message(message):
+                data = {
+                    'chat_id': self.telegram_chat_id,
+                    'text': part,
+                    'parse_mode': 'HTML',
+                    'disable_web_page_preview': True
+                }
+                if not self.post_telegram_message(url, data):
+                    return False
+            return True
         except Exception:
             return False
 
-    def fetch_page_content(self, url: str) -> Optional[BeautifulSoup]:
-        """Fetch and parse a webpage"""
+    def post_telegram_message(self, url: str, data: dict) -> bool:
+        """Post one message, retrying when rate-limited or on server errors"""
+        for attempt in range(self.telegram_max_retries + 1):
+            self.wait_for_telegram_slot()
+            response = self.telegram_session.post(url, data=data, timeout=TELEGRAM_TIMEOUT)
+            if response.status_code == 200:
+                return True
+            if response.status_code != 429 and response.status_code < 500:
+                return False
+            if attempt < self.telegram_max_retries:
+                time.sleep(self.get_telegram_retry_delay(response, attempt))
+        return False
+
+    def split_telegram_message(self, message: str) -> List[str]:
+        """Split a message at line breaks into parts that fit Telegram's length limit"""
+        if len(message) <= TELEGRAM_MAX_MESSAGE_LENGTH:
+            return [message]
+        
+        parts = []
+        current = ''
+        for line in message.splitlines(keepends=True):
+            if current and len(current) + len(line) > TELEGRAM_MAX_MESSAGE_LENGTH:
+                parts.append(current)
+                current = ''
+            current += line
+        if current.strip():
+            parts.append(current)
+        return parts
+
+    def fetch_page_body(self, url: str):
+        """Download a webpage and return its decoded body.
+        
+        Returns NOT_MODIFIED if the page is unchanged since the previous check,
+        or None if the download failed."""
+        headers = {}
+        etag, last_modified = self.page_validators.get(url, (None, None))
+        if url in self.page_cache:
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
         try:
-            response = self.session.get(url, timeout=15)
+            # The whole body is needed: it is hashed for the page cache and
+            # prefiltered before parsing
+            response = self.session.get(url, headers=headers, timeout=PAGE_TIMEOUT)
+            if response.status_code == 304:
+                return NOT_MODIFIED
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            return soup
+            self.page_validators[url] = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return response.content
         except Exception:
             return None
 
+    def parse_page(self, body: bytes) -> BeautifulSoup:
+        """Parse a downloaded page body"""
+        return BeautifulSoup(body, 'lxml', parse_only=self.page_strainer)
+
     def get_total_pages(self, soup: BeautifulSoup) -> int:
         """Extract total number of pages from pagination"""
         try:
@@ -64,7 +239,7 @@ class CROUSScraper:
             title = soup.find('title')
             if title:
                 title_text = title.get_text()
-                match = re.search(r'page\s+\d+\s+(?:sur|of)\s+(\d+)', title_text, re.IGNORECASE)
+                match = self.title_pages_regex.search(title_text)
                 if match:
                     return int(match.group(1))
             
@@ -89,20 +264,38 @@ class CROUSScraper:
                     if page_numbers:
                         return max(page_numbers)
             
-            # Pattern 3: Look in page text for "X résultats"
-            text_content = soup.get_text()
-            results_match = re.search(r'(\d+)\s+résultats?', text_content, re.IGNORECASE)
+            # Pattern 3: Look for "X résultats" around the text that mentions results,
+            # instead of building the text of the whole page
+            results_match = None
+            mentions_results = False
+            for text in soup.strings:
+                if 'résultat' not in text.lower():
+                    continue
+                mentions_results = True
+                # The count may sit in a sibling element ("<span>42</span> <span>résultats</span>"),
+                # so widen up to the enclosing block until it is found
+                element = text.parent
+                while element is not None:
+                    results_match = self.results_count_regex.search(element.get_text())
+                    if results_match or element.name in self.block_tags:
+                        break
+                    element = element.parent
+                if results_match:
+                    break
+            if mentions_results and not results_match:
+                # The count may still span blocks; search the whole page text as before
+                results_match = self.results_count_regex.search(soup.get_text())
             if results_match:
                 total_results = int(results_match.group(1))
                 estimated_pages = (total_results + 19) // 20
                 return min(estimated_pages, 10)
             
-            # Pattern 4: Check URL parameters in links
-            links = soup.find_all('a', href=True)
+            # Pattern 4: Check URL parameters in links (only links carrying a page parameter)
+            links = soup.find_all('a', href=lambda href: href and 'page=' in href)
             max_page = 1
             for link in links:
                 href = link.get('href', '')
-                page_match = re.search(r'[?&]page=(\d+)', href)
+                page_match = self.page_param_regex.search(href)
                 if page_match:
                     page_num = int(page_match.group(1))
                     max_page = max(max_page, page_num)
@@ -116,138 +309,200 @@ class CROUSScraper:
 
     def remove_only_search_elements(self, soup: BeautifulSoup) -> BeautifulSoup:
         """Remove ONLY search-related UI elements, keep everything else"""
-        search_selectors_to_remove = [
-            '.search-suggestions',
-            '.autocomplete',
-            '.search-form',
-            '.search-bar',
-            '.search-input',
-            'input[type="search"]',
-            '[class*="search-suggestion"]',
-            '[class*="autocomplete"]',
-            '[id*="search-suggestion"]',
-            '[id*="autocomplete"]',
-            'script',
-            'style',
-        ]
-        
-        for selector in search_selectors_to_remove:
-            elements = soup.select(selector)
-            for element in elements:
+        for element in self.search_selector.select(soup):
+            # Nested matches are already gone with their decomposed ancestor
+            if not element.decomposed:
                 element.decompose()
         
         return soup
 
-    def check_for_city_anywhere(self, soup: BeautifulSoup, url: str) -> bool:
-        """Check if the target city appears anywhere in content"""
-        try:
-            cleaned_soup = self.remove_only_search_elements(soup)
-            all_text = cleaned_soup.get_text()
-            pattern = rf'\b{re.escape(self.target_city)}\b'
-            return bool(re.search(pattern, all_text, re.IGNORECASE))
-        except Exception:
-            return False
+    def check_for_city_anywhere(self, cleaned_soup: BeautifulSoup) -> bool:
+        """Check if the target city appears anywhere in an already-cleaned page"""
+        # Stops at the first matching text node instead of building every context;
+        # looks at the same text nodes as the extract_city_context walk
+        return any(isinstance(node, NavigableString) and self.text_mentions_city(node)
+                   for node in cleaned_soup.descendants)
 
-    def extract_city_context(self, soup: BeautifulSoup) -> List[dict]:
-        """Extract all contexts where the target city appears"""
+    def text_mentions_city(self, text: str) -> bool:
+        """Check one text node for the city as a whole word"""
+        # Substring test first; the regex only confirms word boundaries
+        return self.target_city in text.lower() and self.city_regex.search(text) is not None
+
+    def extract_city_context(self, cleaned_soup: BeautifulSoup) -> List[dict]:
+        """Extract all contexts where the target city appears in an already-cleaned page"""
         contexts = []
         try:
-            cleaned_soup = self.remove_only_search_elements(soup)
-            pattern = rf'\b{re.escape(self.target_city)}\b'
-            all_elements = cleaned_soup.find_all(
-                text=re.compile(pattern, re.IGNORECASE))
+            # One walk over the page: number every node, index headings by position
+            # and collect the text nodes mentioning the city
+            positions = {id(cleaned_soup): -1}
+            headings = {tag: ([], []) for tag in self.heading_tags}
+            all_elements = []
+            for position, node in enumerate(cleaned_soup.descendants):
+                positions[id(node)] = position
+                if isinstance(node, NavigableString):
+                    if self.text_mentions_city(node):
+                        all_elements.append(node)
+                elif node.name in headings:
+                    headings[node.name][0].append(position)
+                    headings[node.name][1].append(node)
             
+            seen_contexts = set()
+            absolute_links = {}
             for text in all_elements:
                 parent = text.parent
                 if parent:
                     element_text = parent.get_text(strip=True)
+                    context = ' '.join(element_text[:400].split())
+                    
+                    # Skip short and duplicate contexts before looking up their title and link
+                    if not context or len(context) <= 10:
+                        continue
+                    context_key = context[:100]
+                    if context_key in seen_contexts:
+                        continue
+                    seen_contexts.add(context_key)
+                    
                     title = "Unknown"
                     link = ""
                     
-                    for title_tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                        title_elem = parent.find(title_tag) or parent.find_previous(
-                            title_tag) or parent.find_next(title_tag)
-                        if title_elem:
-                            title = title_elem.get_text(strip=True)
-                            break
+                    title_elem = self.find_nearest_heading(parent, positions, headings)
+                    if title_elem:
+                        title = title_elem.get_text(strip=True)
                     
                     link_elem = parent.find('a') or parent.find_parent('a')
-                    if link_elem and link_elem.get('href'):
-                        link = urljoin(self.base_url, link_elem.get('href'))
-                    
-                    context = element_text[:400].strip()
-                    context = ' '.join(context.split())
+                    href = link_elem.get('href') if link_elem else None
+                    if href:
+                        if href not in absolute_links:
+                            absolute_links[href] = urljoin(self.base_url, href)
+                        link = absolute_links[href]
                     
-                    if context and len(context) > 10:
-                        contexts.append({
-                            'title': title,
-                            'link': link,
-                            'context': context,
-                            'element_type': parent.name or 'text'
-                        })
+                    contexts.append({
+                        'title': title,
+                        'link': link,
+                        'context': context,
+                        'element_type': parent.name or 'text'
+                    })
             
-            unique_contexts = []
-            seen_contexts = set()
-            for ctx in contexts:
-                context_key = ctx['context'][:100]
-                if context_key not in seen_contexts:
-                    seen_contexts.add(context_key)
-                    unique_contexts.append(ctx)
-            
-            return unique_contexts
+            return contexts
         except Exception:
             return []
 
-    def scan_single_url(self, url: str) -> dict:
-        """Scan a single URL for city mentions"""
-        soup = self.fetch_page_content(url)
-        if not soup:
-            return {'found_city': False, 'contexts': [], 'url': url, 'page_number': None}
-        
-        found_city = self.check_for_city_anywhere(soup, url)
-        contexts = []
-        if found_city:
-            contexts = self.extract_city_context(soup)
-        
-        page_match = re.search(r'[?&]page=(\d+)', url)
-        page_number = int(page_match.group(1)) if page_match else 1
+    def find_nearest_heading(self, element: Tag, positions: dict, headings: dict) -> Optional[Tag]:
+        """Find the heading for an element: for each level h1-h6, prefer one inside it,
+        then the closest one before it, then the first one after it"""
+        start = positions[id(element)]
+        end = start + sum(1 for _ in element.descendants)
+        for tag in self.heading_tags:
+            tag_positions, tag_elements = headings[tag]
+            after = bisect_right(tag_positions, start)
+            if after < len(tag_positions) and tag_positions[after] <= end:
+                return tag_elements[after]
+            before = bisect_left(tag_positions, start)
+            if before > 0:
+                return tag_elements[before - 1]
+            if after < len(tag_positions):
+                return tag_elements[after]
+        return None
+
+    def scan_single_url(self, url: str, soup: BeautifulSoup) -> dict:
+        """Scan a parsed search page for city mentions"""
+        # A page counts as a hit whenever the city is mentioned, even if every mention
+        # is too short to be kept as a context; pages without any mention skip the
+        # positional walk altogether
+        cleaned_soup = self.remove_only_search_elements(soup)
+        found_city = self.check_for_city_anywhere(cleaned_soup)
+        contexts = self.extract_city_context(cleaned_soup) if found_city else []
         
         return {
             'found_city': found_city,
             'contexts': contexts,
             'url': url,
-            'page_number': page_number
+            'page_number': self.get_page_number(url)
         }
 
+    def get_page_number(self, url: str) -> int:
+        """Page number of a search URL, from its page= parameter"""
+        page_match = self.page_param_regex.search(url)
+        return int(page_match.group(1)) if page_match else 1
+
+    def body_may_mention_city(self, body: bytes) -> bool:
+        """Cheap test on a raw page: False only if the city cannot appear in its text"""
+        try:
+            text = body.decode('utf-8')
+        except UnicodeDecodeError:
+            # Not UTF-8: leave it to the parser to work out the encoding
+            return True
+        return self.target_city in html.unescape(text).lower()
+
+    def scan_page_body(self, url: str, body: Optional[bytes]) -> tuple:
+        """Scan a downloaded page, returning (total pages, scan result).
+        
+        Results are cached per URL, keyed by a 304 answer or a hash of the body,
+        so a page that has not changed since the previous check is neither parsed
+        nor searched again. The total page count is only worked out for the first
+        search page."""
+        failed = (None, {'found_city': False, 'contexts': [], 'url': url, 'page_number': None})
+        cached = self.page_cache.get(url)
+        if body is NOT_MODIFIED and cached:
+            return cached[1], cached[2]
+        if body is None or body is NOT_MODIFIED:
+            return failed
+        
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if cached and cached[0] == digest:
+            return cached[1], cached[2]
+        
+        if url != self.main_search_url and not self.body_may_mention_city(body):
+            # Nothing to find here; skip parsing (the first page is always parsed
+            # for its page count)
+            total_pages = None
+            result = {'found_city': False, 'contexts': [], 'url': url, 'page_number': self.get_page_number(url)}
+        else:
+            # A page that fails to parse or scan is skipped, not the whole check
+            try:
+                soup = self.parse_page(body)
+                total_pages = self.get_total_pages(soup) if url == self.main_search_url else None
+                result = self.scan_single_url(url, soup)
+            except Exception:
+                # The validators already describe this new body; drop them so the next
+                # check downloads it again instead of getting a 304 for the old result
+                self.page_validators.pop(url, None)
+                return failed
+        self.page_cache[url] = (digest, total_pages, result)
+        return total_pages, result
+
     def scan_for_city_accommodations(self, max_pages: int = 10) -> List[dict]:
         """Main method to scan for city mentions with pagination support"""
         all_city_results = []
         
         print(f"Fetching first page to determine pagination...")
-        first_page_soup = self.fetch_page_content(self.main_search_url)
-        if not first_page_soup:
+        first_page_body = self.fetch_page_body(self.main_search_url)
+        if first_page_body is None:
             print("Failed to fetch first page")
             return all_city_results
         
-        total_pages = self.get_total_pages(first_page_soup)
+        total_pages, first_result = self.scan_page_body(self.main_search_url, first_page_body)
+        if total_pages is None:
+            print("Failed to fetch first page")
+            return all_city_results
+        if first_result['found_city']:
+            all_city_results.append(first_result)
         print(f"Total pages detected: {total_pages}")
         
         pages_to_scan = min(total_pages, max_pages)
         print(f"Will scan {pages_to_scan} page(s)")
         
-        # Scan first page
-        result = self.scan_single_url(self.main_search_url)
-        if result['found_city']:
-            all_city_results.append(result)
-        
-        # Scan remaining pages
-        for page_num in range(2, pages_to_scan + 1):
-            url = f"{self.main_search_url}?page={page_num}"
-            print(f"Scanning page {page_num}/{pages_to_scan}...")
-            result = self.scan_single_url(url)
-            if result['found_city']:
-                all_city_results.append(result)
-            time.sleep(1)
+        # Fetch remaining pages concurrently (network-bound, so threads overlap the waits)
+        urls = [f"{self.main_search_url}?page={page_num}" for page_num in range(2, pages_to_scan + 1)]
+        if urls:
+            print(f"Fetching pages 2-{pages_to_scan}...")
+            with ThreadPoolExecutor(max_workers=min(len(urls), 8)) as executor:
+                bodies = list(executor.map(self.fetch_page_body, urls))
+            
+            for url, body in zip(urls, bodies):
+                _, result = self.scan_page_body(url, body)
+                if result['found_city']:
+                    all_city_results.append(result)
         
         return all_city_results
 
@@ -257,32 +512,32 @@ class CROUSScraper:
             return f"No {self.target_city.title()} mentions found on the CROUS housing website."
         
         city_name = self.target_city.title()
-        message = f"🏠 {city_name.upper()} FOUND!\n\n"
+        parts = [f"🏠 {city_name.upper()} FOUND!\n\n"]
         
         total_contexts = sum(len(result['contexts']) for result in results)
-        message += f"Found {city_name} mentioned {total_contexts} time(s) across {len(results)} page(s):\n\n"
+        parts.append(f"Found {city_name} mentioned {total_contexts} time(s) across {len(results)} page(s):\n\n")
         
         for i, result in enumerate(results, 1):
             page_num = result.get('page_number', i)
-            message += f"📍 Page {page_num}:\n"
-            message += f"🔗 View Page\n\n"
+            parts.append(f"📍 Page {page_num}:\n")
+            parts.append(f"🔗 View Page\n\n")
             
             contexts = result.get('contexts', [])
             if contexts:
-                message += f"🔍 Found {len(contexts)} mention(s):\n"
+                parts.append(f"🔍 Found {len(contexts)} mention(s):\n")
                 for j, context in enumerate(contexts[:3], 1):
-                    message += f"\n{j}. {context.get('title', 'Unknown')}\n"
+                    parts.append(f"\n{j}. {context.get('title', 'Unknown')}\n")
                     if context.get('link'):
-                        message += f"🔗 View Details\n"
+                        parts.append(f"🔗 View Details\n")
                     ctx_text = context.get('context', '')[:250]
-                    message += f"📝 {ctx_text}...\n"
+                    parts.append(f"📝 {ctx_text}...\n")
                 
                 if len(contexts) > 3:
-                    message += f"\n... and {len(contexts) - 3} more mentions\n"
+                    parts.append(f"\n... and {len(contexts) - 3} more mentions\n")
             
-            message += "\n➖➖➖➖➖➖➖➖➖➖\n\n"
+            parts.append("\n➖➖➖➖➖➖➖➖➖➖\n\n")
         
-        return message
+        return ''.join(parts)
 
 
 class CROUSMonitorGUI:
@@ -310,15 +565,21 @@ class CROUSMonitorGUI:
         
         # Variables
         self.monitoring = False
+        # Set to wake the monitor thread out of its wait between checks
+        self.stop_event = threading.Event()
         self.monitor_thread = None
         self.scraper = None
         self.current_max_pages = 10
         
+        # Tk calls made from worker threads, run on the Tk thread by process_ui_queue
+        self.ui_queue = queue.Queue()
+        
         self.setup_ui()
         self.setup_logging()
         self.load_settings()
         
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.after(100, self.process_ui_queue)
 
     def load_settings(self):
         """Load settings from JSON file"""
@@ -357,8 +618,16 @@ class CROUSMonitorGUI:
                 'saved_at': datetime.now().isoformat()
             }
             
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=2, ensure_ascii=False)
+            contents = json.dumps(settings, indent=2, ensure_ascii=False).encode('utf-8')
+            
+            # Write to a temporary file and swap it in, so a crash mid-write
+            # can never leave a truncated settings file behind
+            tmp_file = self.settings_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(contents)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.settings_file)
             
             self.log_message("Settings saved successfully")
         except Exception as e:
@@ -373,6 +642,7 @@ class CROUSMonitorGUI:
         
         if self.monitoring:
             self.monitoring = False
+            self.stop_event.set()
         
         self.root.destroy()
 
@@ -618,15 +888,14 @@ class CROUSMonitorGUI:
     def setup_logging(self):
         """Setup custom logging to display in GUI"""
         class GUILogHandler(logging.Handler):
-            def __init__(self, text_widget):
+            def __init__(self, gui):
                 super().__init__()
-                self.text_widget = text_widget
+                self.gui = gui
             
             def emit(self, record):
                 msg = self.format(record)
                 timestamp = datetime.now().strftime("%H:%M:%S")
-                self.text_widget.insert(tk.END, f"[{timestamp}] {msg}\n")
-                self.text_widget.see(tk.END)
+                self.gui.call_on_ui(self.gui.append_log_line, f"[{timestamp}] {msg}\n")
         
         self.logger = logging.getLogger("CROUSMonitor")
         self.logger.setLevel(logging.INFO)
@@ -634,14 +903,55 @@ class CROUSMonitorGUI:
         for handler in self.logger.handlers[:]:
             self.logger.removeHandler(handler)
         
-        gui_handler = GUILogHandler(self.log_text)
+        gui_handler = GUILogHandler(self)
         gui_handler.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
         self.logger.addHandler(gui_handler)
 
+    def call_on_ui(self, func, *args, **kwargs):
+        """Run a Tk call on the Tk thread; Tkinter widgets must not be touched from other threads"""
+        if threading.current_thread() is threading.main_thread():
+            func(*args, **kwargs)
+        else:
+            self.ui_queue.put((func, args, kwargs))
+
+    def process_ui_queue(self):
+        """Run the Tk calls queued by worker threads, then check again shortly.
+        Consecutive log lines are appended to the log in a single insert."""
+        log_lines = []
+        try:
+            while True:
+                try:
+                    func, args, kwargs = self.ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if func == self.append_log_line:
+                    log_lines.append(args[0])
+                    continue
+                if log_lines:
+                    self.run_ui_call(self.append_log_line, (''.join(log_lines),), {})
+                    log_lines = []
+                self.run_ui_call(func, args, kwargs)
+            if log_lines:
+                self.run_ui_call(self.append_log_line, (''.join(log_lines),), {})
+        finally:
+            # Always reschedule, or later updates from worker threads would be lost
+            self.root.after(100, self.process_ui_queue)
+
+    def run_ui_call(self, func, args, kwargs):
+        """Run one queued Tk call; a failing call must not stop the ones after it"""
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            print(f"UI update failed: {e}")
+
     def log_message(self, message, level="INFO"):
         """Log a message to the GUI"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {level} - {message}\n")
+        self.call_on_ui(self.append_log_line, f"[{timestamp}] {level} - {message}\n")
+
+    def append_log_line(self, line):
+        """Append one or more lines to the log text area"""
+        self.log_text.insert(tk.END, line)
         self.log_text.see(tk.END)
 
     def clear_log(self):
@@ -681,6 +991,7 @@ class CROUSMonitorGUI:
             self.current_max_pages = max_pages
             
             self.monitoring = True
+            self.stop_event.clear()
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
             self.test_button.config(state=tk.DISABLED)
@@ -688,7 +999,8 @@ class CROUSMonitorGUI:
             self.status_label.config(text="Status: Monitoring active")
             
             startup_message = f"🤖 <b>CROUS {city_name.title()} Monitor Started!</b>\n\nMonitoring for {city_name.title()} mentions every {interval_minutes} minutes.\nScanning up to {max_pages} pages per check."
-            self.scraper.send_telegram_message(startup_message)
+            # Sent off the Tk thread: a rate-limited send can wait out several retries
+            threading.Thread(target=self.scraper.send_telegram_message, args=(startup_message,), daemon=True).start()
             
             self.monitor_thread = threading.Thread(
                 target=self.monitoring_loop,
@@ -706,11 +1018,12 @@ class CROUSMonitorGUI:
     def stop_monitoring(self):
         """Stop the monitoring process"""
         self.monitoring = False
+        self.stop_event.set()
         
         if self.scraper:
             city_name = self.scraper.target_city.title()
             stop_message = f"🛑 <b>CROUS {city_name} Monitor Stopped</b>\n\nMonitoring has been stopped by user."
-            self.scraper.send_telegram_message(stop_message)
+            threading.Thread(target=self.scraper.send_telegram_message, args=(stop_message,), daemon=True).start()
         
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
@@ -762,7 +1075,8 @@ class CROUSMonitorGUI:
                 except Exception as e:
                     self.log_message(f"Test check failed: {str(e)}", "ERROR")
                 finally:
-                    self.test_button.config(state=tk.NORMAL)
+                    scraper.close()
+                    self.call_on_ui(self.test_button.config, state=tk.NORMAL)
             
             threading.Thread(target=run_test, daemon=True).start()
         
@@ -774,6 +1088,10 @@ class CROUSMonitorGUI:
     def monitoring_loop(self, interval_minutes, max_pages):
         """Main monitoring loop running in separate thread"""
         interval_seconds = interval_minutes * 60
+        failures = 0
+        # The loop works only with the scraper it was started with: a restart may
+        # already have replaced self.scraper
+        scraper = self.scraper
         
         try:
             while self.monitoring:
@@ -781,44 +1099,50 @@ class CROUSMonitorGUI:
                     # Calculate next check time
                     next_check = datetime.now().replace(second=0, microsecond=0)
                     next_check = next_check.replace(minute=next_check.minute + int(interval_minutes))
-                    self.next_check_label.config(text=f"Next check: {next_check.strftime('%H:%M')}")
+                    self.call_on_ui(self.next_check_label.config, text=f"Next check: {next_check.strftime('%H:%M')}")
                     
                     self.log_message("Starting scheduled check...")
                     
                     # Perform check
-                    results = self.scraper.scan_for_city_accommodations(max_pages)
+                    results = scraper.scan_for_city_accommodations(max_pages)
                     
                     if results:
-                        message = self.scraper.format_telegram_message(results)
-                        success = self.scraper.send_telegram_message(message)
-                        city_name = self.scraper.target_city.title()
+                        message = scraper.format_telegram_message(results)
+                        success = scraper.send_telegram_message(message)
+                        city_name = scraper.target_city.title()
                         if success:
                             self.log_message(f"✅ {city_name} found! Telegram notification sent.")
                         else:
                             self.log_message(f"⚠️ {city_name} found but failed to send Telegram message", "WARNING")
                     else:
-                        city_name = self.scraper.target_city.title()
+                        city_name = scraper.target_city.title()
                         self.log_message(f"ℹ️ No {city_name} mentions found")
+                    failures = 0
                     
-                    # Wait for next check
-                    for remaining in range(int(interval_seconds), 0, -1):
-                        if not self.monitoring:
-                            break
-                        time.sleep(1)
+                    # Wait for next check, returning early if monitoring is stopped
+                    if self.stop_event.wait(timeout=interval_seconds):
+                        break
                 
                 except Exception as e:
                     self.log_message(f"Error during monitoring: {str(e)}", "ERROR")
-                    time.sleep(60)
+                    failures += 1
+                    # Back off from 60 s, doubling per consecutive failure up to the check
+                    # interval, with jitter so retries during an outage are spread out
+                    delay = min(interval_seconds, 60 * 2 ** (failures - 1))
+                    if self.stop_event.wait(timeout=delay / 2 + random.uniform(0, delay / 2)):
+                        break
         
         except Exception:
             pass
         finally:
             # Send notification if monitoring stopped unexpectedly (not by user)
             if self.monitoring:
-                city_name = self.scraper.target_city.title()
+                city_name = scraper.target_city.title()
                 error_message = f"❌ <b>CROUS {city_name} Monitor Stopped</b>\n\nMonitoring has stopped unexpectedly."
-                self.scraper.send_telegram_message(error_message)
+                scraper.send_telegram_message(error_message)
                 self.monitoring = False
+            # The scan using the sessions is over; release their pooled connections
+            scraper.close()
 
     def run(self):
         """Start the GUI application"""